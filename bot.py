@@ -16,6 +16,16 @@ from card_predictor import CardPredictor
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Types d'updates demandés à Telegram : uniquement ceux traités par TelegramHandlers.handle_update
+ALLOWED_UPDATES = [
+    'message',              # commandes en privé / groupe
+    'edited_message',       # vérification sur messages édités (groupe source)
+    'channel_post',         # canal source : collecte, vérification, prédiction
+    'edited_channel_post',  # canal source : résultats finalisés par édition
+    'callback_query',       # boutons INTER et /config
+    'my_chat_member',       # message d'accueil quand le bot est ajouté
+]
+
 class TelegramBot:
     """
     Classe de haut niveau pour gérer les interactions avec l'API Telegram
@@ -29,6 +39,8 @@ class TelegramBot:
         
         # Initialize advanced handlers
         self.handlers = TelegramHandlers(token)
+        # Même session HTTP (keep-alive) que les handlers pour tous les appels API
+        self.session = self.handlers.session
         
         if not self.handlers.card_predictor:
             logger.error("🚨 Le moteur de prédiction n'a pas pu être initialisé.")
@@ -82,7 +94,7 @@ class TelegramBot:
                     'caption': '📦 Deployment Package for render.com'
                 }
 
-                response = requests.post(url, data=data, files=files, timeout=60)
+                response = self.session.post(url, data=data, files=files, timeout=60)
                 return response.json().get('ok', False)
         except Exception as e:
             logger.error(f"Error sending document: {e}")
@@ -92,13 +104,12 @@ class TelegramBot:
         """Set webhook URL for the bot"""
         try:
             url = f"{self.base_url}/setWebhook"
-            # MISE À JOUR CRITIQUE: Inclure 'callback_query' et 'my_chat_member'
             data = {
                 'url': webhook_url,
-                'allowed_updates': ['message', 'edited_message', 'channel_post', 'edited_channel_post', 'callback_query', 'my_chat_member']
+                'allowed_updates': ALLOWED_UPDATES
             }
 
-            response = requests.post(url, json=data, timeout=10)
+            response = self.session.post(url, json=data, timeout=10)
             result = response.json()
             if result.get('ok'):
                 logger.info(f"Webhook set successfully: {webhook_url}")
@@ -118,7 +129,7 @@ class TelegramBot:
         """Get bot information"""
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=30)
             result = response.json()
             return result.get('result', {}) if result.get('ok') else {}
         except Exception as e:
@@ -5,9 +5,20 @@ import logging
 import time
 import os
 import json
+import atexit
+import hashlib
+import threading
+import queue
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Dict, List, Tuple, Any
-from collections import defaultdict
+from collections import defaultdict, Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 # Mis à jour à DEBUG pour vous aider à tracer la collecte.
@@ -21,13 +32,157 @@ STATIC_RULES = {
     "8♣️": "♠️", "8♠️": "♣️", 
     "7♠️": "♠️", "7♣️": "♣️",
     "6♦️": "♣️", "6♣️": "♦️", 
-    "A❤️": "❤️", 
-    "5❤️": "❤️", "5♠️": "♠️"
+    "A♥️": "❤️", 
+    "5♥️": "❤️", "5♠️": "♠️"
 }
+# Forme {déclencheur: (enseigne prédite, origine)} partagée avec les règles INTER
+_STATIC_RULE_MAP = {trigger: (suit, "STATIQUE") for trigger, suit in STATIC_RULES.items()}
+
+# --- 2. EXPRESSIONS RÉGULIÈRES (compilées une seule fois) ---
+_RE_PARENTHESES = re.compile(r'\(([^)]+)\)')
+_RE_FIRST_GROUP = re.compile(r'\(([^)]*)\)')
+# Ne reconnaît que ♥️ : les extracteurs de cartes normalisent eux-mêmes le texte (voir _normalize_hearts)
+_RE_CARD = re.compile(r'(\d+|[AKQJ])(♠️|♥️|♦️|♣️)', re.IGNORECASE)
+_RE_GAME = re.compile(r'#N(\d+)\.|🔵(\d+)🔵', re.IGNORECASE)
+# Indicateurs de message temporaire / finalisé (alternation : ➡️ compte deux caractères)
+_RE_PENDING_INDICATORS = re.compile('⏰|▶|🕐|➡️')
+_RE_COMPLETION_INDICATORS = re.compile('[✅🔰]')
+
+# Formats (cartes 1er groupe, cartes 2e groupe) acceptés pour un message édité finalisé
+VALID_EDITED_LAYOUTS = frozenset({(3, 2), (3, 3), (2, 3)})
 
 # Symboles pour les status de vérification
 SYMBOL_MAP = {0: '✅0️⃣', 1: '✅1️⃣', 2: '✅2️⃣'}
 
+# Décalage maximal entre le jeu prédit et le résultat qui le vérifie
+MAX_VERIFICATION_OFFSET = 5
+
+# Nombre maximal d'observations INTER conservées (les plus anciennes sortent en premier)
+INTER_DATA_MAX = 5000
+
+# Délai minimum (secondes) entre deux écritures de l'état sur disque
+SAVE_DEBOUNCE_SECONDS = 2.0
+
+def _json_dumps(data: Any) -> bytes:
+    """Sérialise en JSON compact (orjson si disponible, sinon module json standard)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# --- Écriture des fichiers d'état en arrière-plan ---
+# Les appelants sérialisent (rapide) puis déposent (fichier, octets, empreintes) ; un thread unique
+# écrit dans l'ordre d'arrivée, hors du traitement des messages. La file est vidée à l'arrêt.
+# En cas d'échec, l'empreinte du fichier est oubliée : la sauvegarde suivante le réécrira.
+_WRITE_QUEUE: "queue.Queue[Tuple[str, bytes, Dict[str, bytes]]]" = queue.Queue()
+
+def _write_file_atomic(filename: str, blob: bytes):
+    """Écriture atomique : fichier temporaire (forcé sur disque) puis remplacement."""
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as f:
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+def _writer_loop():
+    while True:
+        filename, blob, saved_hashes = _WRITE_QUEUE.get()
+        try:
+            _write_file_atomic(filename, blob)
+        except Exception as e:
+            saved_hashes.pop(filename, None)
+            logger.error(f"❌ Erreur sauvegarde {filename}: {e}")
+        finally:
+            _WRITE_QUEUE.task_done()
+
+threading.Thread(target=_writer_loop, name='state-writer', daemon=True).start()
+# Enregistré avant les atexit des instances : exécuté après leur dernier _flush_state
+atexit.register(_WRITE_QUEUE.join)
+
+def _normalize_hearts(text: str) -> str:
+    """Unifie le cœur en ♥️ (forme des cartes) ; appliqué par les extracteurs de cartes, une fois par groupe mis en cache."""
+    return text.replace("❤️", "♥️")
+
+# Un même message est analysé par la collecte, la vérification et la prédiction :
+# les fonctions d'analyse pures ci-dessous sont mémorisées par texte de message.
+PARSE_CACHE_SIZE = 256
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_game_number(message: str) -> Optional[int]:
+    """Numéro de jeu (#N123. ou 🔵123🔵), None si absent."""
+    if '#' not in message and '🔵' not in message: return None
+    match = _RE_GAME.search(message)
+    return int(match.group(1) or match.group(2)) if match else None
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _first_group(message: str) -> Optional[str]:
+    """Contenu normalisé (❤️ -> ♥️) du PREMIER groupe entre parenthèses (None si absent) ; partagé par les extracteurs de cartes."""
+    if '(' not in message: return None
+    match = _RE_FIRST_GROUP.search(message)
+    return _normalize_hearts(match.group(1)) if match else None
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_first_card(message: str) -> Optional[Tuple[str, str]]:
+    """(carte, enseigne) de la PREMIÈRE carte du PREMIER groupe (cœur en ♥️)."""
+    group = _first_group(message)
+    if group is None: return None
+    
+    # Seule la première carte est utile : search au lieu de findall
+    card = _RE_CARD.search(group)
+    if not card: return None
+    v, c = card.groups()
+    return f"{v.upper()}{c}", c
+
+@lru_cache(maxsize=8)
+def _format_timestamp(timestamp: float, fmt: str) -> str:
+    """Horodatage formaté pour /etat ; last_reset_time / last_analysis_time changent rarement."""
+    return datetime.fromtimestamp(timestamp).strftime(fmt)
+
+# --- 3. FICHIERS D'ÉTAT (attribut -> (fichier, type de contenu)) ---
+# 'int_dict' : dict JSON dont les clés sont des numéros de jeu ; 'set' : liste JSON chargée en set ;
+# 'scalar' : valeur simple (None si absente). L'ordre est celui des écritures.
+STATE_FILES = {
+    'predictions': ('predictions.json', 'int_dict'),
+    'processed_messages': ('processed.json', 'set'),
+    'last_prediction_time': ('last_prediction_time.json', 'scalar'),
+    'last_predicted_game_number': ('last_predicted_game_number.json', 'scalar'),
+    'consecutive_fails': ('consecutive_fails.json', 'scalar'),
+    'inter_data': ('inter_data.json', 'list'),
+    'sequential_history': ('sequential_history.json', 'int_dict'),
+    'is_inter_mode_active': ('inter_mode_status.json', 'scalar'),
+    'smart_rules': ('smart_rules.json', 'list'),
+    'active_admin_chat_id': ('active_admin_chat_id.json', 'scalar'),
+    'last_analysis_time': ('last_analysis_time.json', 'scalar'),
+    'pending_edits': ('pending_edits.json', 'int_dict'),
+    'collected_games': ('collected_games.json', 'set'),
+    'single_trigger_until': ('single_trigger_until.json', 'scalar'),
+    'consecutive_two_wins': ('consecutive_two_wins.json', 'scalar'),
+    'wait_until_next_update': ('wait_until_next_update.json', 'scalar'),
+    'last_reset_time': ('last_reset_time.json', 'scalar'),
+    'prediction_count_by_channel': ('prediction_count_by_channel.json', 'dict'),
+}
+CONFIG_FILE = 'channels_config.json'
+
+# Attributs modifiés par reset_automatic_predictions
+RESET_STATE_ATTRS = (
+    'predictions', 'pending_edits', 'last_prediction_time', 'last_predicted_game_number',
+    'consecutive_fails', 'single_trigger_until', 'consecutive_two_wins', 'wait_until_next_update',
+    'last_reset_time',
+)
+
+_EMPTY_STATE = {'dict': dict, 'int_dict': dict, 'list': list, 'set': set, 'scalar': lambda: None}
+
+# État rarement utilisé : non lu au démarrage, chargé au premier accès (voir CardPredictor.__getattr__)
+# attribut -> valeur par défaut si le fichier est absent ou vide
+LAZY_STATE_DEFAULTS = {
+    'processed_messages': set,
+    'pending_edits': dict,
+    'last_reset_time': int,
+    'prediction_count_by_channel': dict,
+}
+
 class CardPredictor:
     """Gère la logique de prédiction d'ENSEIGNE (Couleur) et la vérification."""
 
@@ -39,16 +194,27 @@ class CardPredictor:
         self.HARDCODED_PREDICTION_ID = -1003341134749 # <--- ID du canal PRÉDICTION/RÉSULTAT
         # <<<<<<<<<<<<<<<< FIN ZONE CRITIQUE >>>>>>>>>>>>>>>>
 
-        # --- A. Chargement des Données ---
-        self.predictions = self._load_data('predictions.json') 
-        self.processed_messages = self._load_data('processed.json', is_set=True) 
-        self.last_prediction_time = self._load_data('last_prediction_time.json', is_scalar=True) or 0
-        self.last_predicted_game_number = self._load_data('last_predicted_game_number.json', is_scalar=True) or 0
-        self.consecutive_fails = self._load_data('consecutive_fails.json', is_scalar=True) or 0
-        self.pending_edits: Dict[int, Dict] = self._load_data('pending_edits.json')
+        # --- A. Chargement des Données (lectures parallèles au démarrage) ---
+        # Un seul listage du dossier : les fichiers absents prennent directement leur valeur vide
+        with os.scandir('.') as entries:
+            existing = {entry.name for entry in entries if entry.is_file()}
+        def load(spec):
+            filename, kind = spec
+            return self._load_data(filename, kind) if filename in existing else _EMPTY_STATE[kind]()
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            config_future = pool.submit(load, (CONFIG_FILE, 'dict'))
+            eager_attrs = [attr for attr in STATE_FILES if attr not in LAZY_STATE_DEFAULTS]
+            state = dict(zip(eager_attrs, pool.map(load, (STATE_FILES[attr] for attr in eager_attrs))))
+            raw_config = config_future.result()
+        
+        self.predictions: Dict[int, Dict] = state['predictions']
+        self.last_prediction_time = state['last_prediction_time'] or 0
+        self.last_predicted_game_number = state['last_predicted_game_number'] or 0
+        self.consecutive_fails = state['consecutive_fails'] or 0
+        self._index_predictions()
         
         # --- B. Configuration Canaux (AVEC FALLBACK SÉCURISÉ) ---
-        raw_config = self._load_data('channels_config.json')
         self.config_data = raw_config if isinstance(raw_config, dict) else {}
         
         self.target_channel_id = self.config_data.get('target_channel_id')
@@ -61,80 +227,131 @@ class CardPredictor:
         
         # --- C. Logique INTER (Intelligente) ---
         self.telegram_message_sender = telegram_message_sender
-        self.active_admin_chat_id = self._load_data('active_admin_chat_id.json', is_scalar=True)
-        
-        self.sequential_history: Dict[int, Dict] = self._load_data('sequential_history.json') 
-        self.inter_data: List[Dict] = self._load_data('inter_data.json') 
-        self.is_inter_mode_active = self._load_data('inter_mode_status.json', is_scalar=True)
-        self.smart_rules = self._load_data('smart_rules.json')
-        self.last_analysis_time = self._load_data('last_analysis_time.json', is_scalar=True) or 0
-        self.collected_games = self._load_data('collected_games.json', is_set=True)
-        
-        self.single_trigger_until = self._load_data('single_trigger_until.json', is_scalar=True) or 0
-        self.consecutive_two_wins = self._load_data('consecutive_two_wins.json', is_scalar=True) or 0
-        self.wait_until_next_update = self._load_data('wait_until_next_update.json', is_scalar=True) or 0
-        self.last_reset_time = self._load_data('last_reset_time.json', is_scalar=True) or 0
-        self.prediction_count_by_channel = self._load_data('prediction_count_by_channel.json') or {}
+        self.active_admin_chat_id = state['active_admin_chat_id']
+        
+        # Trié par numéro de jeu : l'élagage retire les plus anciens par l'avant
+        self.sequential_history: Dict[int, Dict] = dict(sorted(state['sequential_history'].items()))
+        self.inter_data: deque = deque(state['inter_data'], maxlen=INTER_DATA_MAX)
+        self._rebuild_inter_stats()
+        self.is_inter_mode_active = state['is_inter_mode_active']
+        self.smart_rules = state['smart_rules']
+        self._index_smart_rules()
+        self.last_analysis_time = state['last_analysis_time'] or 0
+        self.collected_games = state['collected_games']
+        
+        self.single_trigger_until = state['single_trigger_until'] or 0
+        self.consecutive_two_wins = state['consecutive_two_wins'] or 0
+        self.wait_until_next_update = state['wait_until_next_update'] or 0
         
         if self.is_inter_mode_active is None:
             self.is_inter_mode_active = True
         
         self.prediction_cooldown = 30 
         
+        # Verrou de l'état : updates Telegram et tâches planifiées (main.py) ne s'exécutent pas en même temps
+        self.lock = threading.RLock()
+        
+        # --- D. Écriture différée de l'état (regroupe les sauvegardes rapprochées) ---
+        self._dirty_state: set = set()  # Attributs de STATE_FILES modifiés depuis la dernière écriture
+        self._last_flush_time = 0.0
+        self._flush_timer: Optional[threading.Timer] = None  # écriture différée en fin de rafale
+        self._saved_hashes: Dict[str, bytes] = {}
+        atexit.register(self._flush_state)
+        
         if self.inter_data and not self.is_inter_mode_active and not self.smart_rules:
              self.analyze_and_set_smart_rules(initial_load=True)
 
     # --- Persistance ---
-    def _load_data(self, filename: str, is_set: bool = False, is_scalar: bool = False) -> Any:
+    def __getattr__(self, name: str) -> Any:
+        """Appelé seulement si l'attribut n'existe pas encore : charge l'état paresseux à la demande."""
+        if name not in LAZY_STATE_DEFAULTS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        value = self._load_data(*STATE_FILES[name]) or LAZY_STATE_DEFAULTS[name]()
+        setattr(self, name, value)
+        return value
+
+    def _load_data(self, filename: str, kind: str = 'list') -> Any:
+        """Charge un fichier d'état ; kind ∈ {'dict', 'int_dict', 'list', 'set', 'scalar'} (voir STATE_FILES)."""
         try:
-            is_dict = filename in ['channels_config.json', 'predictions.json', 'sequential_history.json', 'smart_rules.json', 'pending_edits.json']
-            
             if not os.path.exists(filename):
-                return set() if is_set else (None if is_scalar else ({} if is_dict else []))
-            with open(filename, 'r') as f:
+                return _EMPTY_STATE[kind]()
+            with open(filename, 'rb') as f:
                 content = f.read().strip()
-                if not content: return set() if is_set else (None if is_scalar else ({} if is_dict else []))
-                data = json.loads(content)
-                if is_set: return set(data)
-                if filename in ['sequential_history.json', 'predictions.json', 'pending_edits.json'] and isinstance(data, dict): 
+                if not content: return _EMPTY_STATE[kind]()
+                data = _json_loads(content)
+                if kind == 'set': return set(data)
+                if kind == 'int_dict' and isinstance(data, dict): 
                     return {int(k): v for k, v in data.items()}
                 return data
         except Exception as e:
             logger.error(f"⚠️ Erreur chargement {filename}: {e}")
-            is_dict = filename in ['channels_config.json', 'predictions.json', 'sequential_history.json', 'smart_rules.json', 'pending_edits.json']
-            return set() if is_set else (None if is_scalar else ({} if is_dict else []))
+            return _EMPTY_STATE[kind]()
 
     def _save_data(self, data: Any, filename: str):
         try:
-            if isinstance(data, set): data = list(data)
-            if filename == 'channels_config.json' and isinstance(data, dict):
+            if isinstance(data, (set, deque)): data = list(data)
+            if filename == CONFIG_FILE and isinstance(data, dict):
                 if 'target_channel_id' in data and data['target_channel_id'] is not None:
                     data['target_channel_id'] = int(data['target_channel_id'])
                 if 'prediction_channel_id' in data and data['prediction_channel_id'] is not None:
                     data['prediction_channel_id'] = int(data['prediction_channel_id'])
             
-            with open(filename, 'w') as f: json.dump(data, f, indent=4)
+            blob = _json_dumps(data)
+            blob_hash = hashlib.blake2b(blob, digest_size=8).digest()
+            if self._saved_hashes.get(filename) == blob_hash: return
+            
+            # Empreinte notée dès la mise en file (évite les doublons en attente), retirée par le writer si l'écriture échoue
+            self._saved_hashes[filename] = blob_hash
+            _WRITE_QUEUE.put((filename, blob, self._saved_hashes))
         except Exception as e: logger.error(f"❌ Erreur sauvegarde {filename}: {e}")
 
-    def _save_all_data(self):
-        self._save_data(self.predictions, 'predictions.json')
-        self._save_data(self.processed_messages, 'processed.json')
-        self._save_data(self.last_prediction_time, 'last_prediction_time.json')
-        self._save_data(self.last_predicted_game_number, 'last_predicted_game_number.json')
-        self._save_data(self.consecutive_fails, 'consecutive_fails.json')
-        self._save_data(self.inter_data, 'inter_data.json')
-        self._save_data(self.sequential_history, 'sequential_history.json')
-        self._save_data(self.is_inter_mode_active, 'inter_mode_status.json')
-        self._save_data(self.smart_rules, 'smart_rules.json')
-        self._save_data(self.active_admin_chat_id, 'active_admin_chat_id.json')
-        self._save_data(self.last_analysis_time, 'last_analysis_time.json')
-        self._save_data(self.pending_edits, 'pending_edits.json')
-        self._save_data(self.collected_games, 'collected_games.json')
-        self._save_data(self.single_trigger_until, 'single_trigger_until.json')
-        self._save_data(self.consecutive_two_wins, 'consecutive_two_wins.json')
-        self._save_data(self.wait_until_next_update, 'wait_until_next_update.json')
-        self._save_data(self.last_reset_time, 'last_reset_time.json')
-        self._save_data(self.prediction_count_by_channel, 'prediction_count_by_channel.json')
+    def _save_all_data(self, *attrs: str):
+        """Marque les attributs modifiés (tout l'état si aucun n'est donné) ; écriture au plus une fois toutes les SAVE_DEBOUNCE_SECONDS."""
+        self._dirty_state.update(attrs or STATE_FILES)
+        if time.time() - self._last_flush_time >= SAVE_DEBOUNCE_SECONDS:
+            self._flush_state()
+        elif self._flush_timer is None:
+            # Sans nouvelle sauvegarde, la dernière modification est quand même écrite après le délai
+            self._flush_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self._flush_state_deferred)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Écrit tout de suite l'état modifié et attend la fin des écritures en arrière-plan (ex. avant /deploy)."""
+        with self.lock:
+            self._flush_state()
+        _WRITE_QUEUE.join()
+
+    def _flush_state_deferred(self):
+        """Écriture de fin de rafale (thread du Timer), sous le verrou de l'état."""
+        with self.lock:
+            self._flush_timer = None
+            self._flush_state()
+
+    def _flush_state(self):
+        """Écrit sur disque les seuls fichiers modifiés (appelé aussi à l'arrêt du processus)."""
+        if not self._dirty_state: return
+        dirty, self._dirty_state = self._dirty_state, set()
+        self._last_flush_time = time.time()
+        
+        for attr, (filename, _) in STATE_FILES.items():
+            # Un état paresseux jamais chargé n'a pas pu changer
+            if attr in dirty and (attr not in LAZY_STATE_DEFAULTS or attr in self.__dict__):
+                self._save_data(getattr(self, attr), filename)
+
+    def _index_predictions(self):
+        """Reconstruit l'index des prédictions en attente (les seules à vérifier) et les compteurs de statut."""
+        self._pending_predictions: Dict[int, Dict] = {
+            game: prediction for game, prediction in self.predictions.items() if prediction.get('status') == 'pending'
+        }
+        self._prediction_counts: Counter = Counter()
+        for prediction in self.predictions.values():
+            self._count_prediction(prediction, 1)
+
+    def _count_prediction(self, prediction: Dict, delta: int):
+        """Met à jour les compteurs {statut: n, 'inter': n} lus par get_bot_status."""
+        self._prediction_counts[prediction.get('status')] += delta
+        if prediction.get('is_inter', False): self._prediction_counts['inter'] += delta
 
     def set_channel_id(self, channel_id: int, channel_type: str):
         if not isinstance(self.config_data, dict): self.config_data = {}
@@ -144,30 +361,26 @@ class CardPredictor:
         elif channel_type == 'prediction':
             self.prediction_channel_id = channel_id
             self.config_data['prediction_channel_id'] = channel_id
-        self._save_data(self.config_data, 'channels_config.json')
+        self._save_data(self.config_data, CONFIG_FILE)
         return True
 
     # --- Outils d'Extraction/Comptage ---
     
     def _extract_parentheses_content(self, text: str) -> List[str]:
         """Extrait le contenu de toutes les sections de parenthèses (non incluses)."""
-        pattern = r'\(([^)]+)\)'
-        return re.findall(pattern, text)
+        return _RE_PARENTHESES.findall(text)
 
     def _count_cards_in_content(self, content: str) -> int:
-        """Compte les symboles de cartes (♠️, ♥️, ♦️, ♣️) dans une chaîne, en normalisant ❤️ vers ♥️."""
-        normalized_content = content.replace("❤️", "♥️")
-        return len(re.findall(r'(\d+|[AKQJ])(♠️|♥️|♦️|♣️)', normalized_content, re.IGNORECASE))
+        """Compte les symboles de cartes (♠️, ♥️/❤️, ♦️, ♣️) dans une chaîne."""
+        return len(_RE_CARD.findall(_normalize_hearts(content)))
         
     def has_pending_indicators(self, text: str) -> bool:
         """Vérifie si le message contient des indicateurs suggérant qu'il sera édité (temporaire)."""
-        indicators = ['⏰', '▶', '🕐', '➡️']
-        return any(indicator in text for indicator in indicators)
+        return _RE_PENDING_INDICATORS.search(text) is not None
 
     def has_completion_indicators(self, text: str) -> bool:
         """Vérifie si le message contient des indicateurs de complétion après édition (✅ ou 🔰)."""
-        completion_indicators = ['✅', '🔰']
-        return any(indicator in text for indicator in completion_indicators)
+        return _RE_COMPLETION_INDICATORS.search(text) is not None
         
     def is_final_result_structurally_valid(self, text: str) -> bool:
         """
@@ -185,59 +398,36 @@ class CardPredictor:
 
         # Messages Édités (basé sur le compte de cartes)
         if num_sections == 2:
-            content_1 = matches[0]
-            content_2 = matches[1]
-            
-            count_1 = self._count_cards_in_content(content_1)
-            count_2 = self._count_cards_in_content(content_2)
+            count_1 = self._count_cards_in_content(matches[0])
+            count_2 = self._count_cards_in_content(matches[1])
 
             # Formats acceptés: 3/2, 3/3, 2/3 (3 cartes dans le premier groupe sont supportées)
-            if (count_1 == 3 and count_2 == 2) or \
-               (count_1 == 3 and count_2 == 3) or \
-               (count_1 == 2 and count_2 == 3):
-                return True
+            return (count_1, count_2) in VALID_EDITED_LAYOUTS
 
         return False
         
     # --- Outils d'Extraction (Continuation) ---
     def extract_game_number(self, message: str) -> Optional[int]:
-        match = re.search(r'#N(\d+)\.', message, re.IGNORECASE) 
-        if not match: match = re.search(r'🔵(\d+)🔵', message)
-        return int(match.group(1)) if match else None
+        return _parse_game_number(message)
 
     def extract_card_details(self, content: str) -> List[Tuple[str, str]]:
-        # Normalise ♥️ en ❤️
-        normalized_content = content.replace("♥️", "❤️")
-        # Cherche Valeur + Enseigne (ex: 10♦️, A♠️)
-        return re.findall(r'(\d+|[AKQJ])(♠️|❤️|♦️|♣️)', normalized_content, re.IGNORECASE)
+        # Cherche Valeur + Enseigne (ex: 10♦️, A♠️) ; le cœur est rendu en ♥️
+        return _RE_CARD.findall(_normalize_hearts(content))
 
     def get_first_card_info(self, message: str) -> Optional[Tuple[str, str]]:
         """
         Retourne la PREMIÈRE carte du PREMIER groupe (déclencheur INTER/STATIQUE).
         """
-        match = re.search(r'\(([^)]*)\)', message)
-        if not match: return None
-        
-        details = self.extract_card_details(match.group(1))
-        if details:
-            v, c = details[0]
-            if c == "❤️": c = "♥️" 
-            return f"{v.upper()}{c}", c 
-        return None
+        return _parse_first_card(message)
     
     def get_all_cards_in_first_group(self, message: str) -> List[str]:
         """
         Retourne TOUTES les cartes du PREMIER groupe pour la vérification.
         """
-        match = re.search(r'\(([^)]*)\)', message)
-        if not match: return []
+        group = _first_group(message)
+        if group is None: return []
         
-        details = self.extract_card_details(match.group(1))
-        cards = []
-        for v, c in details:
-            normalized_c = "♥️" if c == "❤️" else c
-            cards.append(f"{v.upper()}{normalized_c}")
-        return cards
+        return [f"{v.upper()}{c}" for v, c in self.extract_card_details(group)]
         
     # --- Logique INTER (Collecte et Analyse) ---
     def collect_inter_data(self, game_number: int, message: str):
@@ -245,8 +435,7 @@ class CardPredictor:
         info = self.get_first_card_info(message)
         if not info: return
         
-        full_card, suit = info
-        result_suit_normalized = suit.replace("❤️", "♥️")
+        full_card, result_suit_normalized = info
         
         # Vérifier si déjà dans collected_games
         if game_number in self.collected_games:
@@ -257,9 +446,23 @@ class CardPredictor:
             else:
                 # Mise à jour de la carte (cas rare mais possible)
                 logger.info(f"🧠 Jeu {game_number} mis à jour: {existing_data.get('carte') if existing_data else 'N/A'} -> {full_card}")
-                self.inter_data = [e for e in self.inter_data if e.get('numero_resultat') != game_number]
-
-        self.sequential_history[game_number] = {'carte': full_card, 'date': datetime.now().isoformat()}
+                kept_entries = []
+                for entry in self.inter_data:
+                    if entry.get('numero_resultat') == game_number:
+                        self._discount_inter_entry(entry)
+                    else:
+                        kept_entries.append(entry)
+                self.inter_data = deque(kept_entries, maxlen=INTER_DATA_MAX)
+
+        collected_at = int(time.time())  # Horodatage epoch (secondes)
+        out_of_order = (
+            game_number not in self.sequential_history and self.sequential_history
+            and game_number < next(reversed(self.sequential_history))
+        )
+        self.sequential_history[game_number] = {'carte': full_card, 'date': collected_at}
+        if out_of_order:
+            # Cas rare (numérotation repartie à zéro) : on retrie pour garder l'ordre
+            self.sequential_history = dict(sorted(self.sequential_history.items()))
         self.collected_games.add(game_number)
         
         n_minus_2 = game_number - 2
@@ -267,20 +470,28 @@ class CardPredictor:
         
         if trigger_entry:
             trigger_card = trigger_entry['carte']
+            if len(self.inter_data) == INTER_DATA_MAX:
+                # L'observation la plus ancienne va sortir du tampon : on la retire des compteurs
+                self._discount_inter_entry(self.inter_data[0])
             self.inter_data.append({
                 'numero_resultat': game_number,
                 'declencheur': trigger_card, 
                 'numero_declencheur': n_minus_2,
                 'result_suit': result_suit_normalized, 
-                'date': datetime.now().isoformat()
+                'date': collected_at
             })
+            self._inter_stats[result_suit_normalized][trigger_card] += 1
             logger.info(f"🧠 Jeu {game_number} collecté pour INTER: {trigger_card} -> {result_suit_normalized}")
 
+        # Fenêtre glissante de 50 jeux : retrait des plus anciens uniquement
         limit = game_number - 50
-        self.sequential_history = {k:v for k,v in self.sequential_history.items() if k >= limit}
-        self.collected_games = {g for g in self.collected_games if g >= limit}
+        while self.sequential_history:
+            oldest = next(iter(self.sequential_history))
+            if oldest >= limit: break
+            del self.sequential_history[oldest]
+            self.collected_games.discard(oldest)
         
-        self._save_all_data()
+        self._save_all_data('sequential_history', 'collected_games', 'inter_data')
 
     
     def analyze_and_set_smart_rules(self, chat_id: int = None, initial_load: bool = False, force_activate: bool = False):
@@ -288,15 +499,8 @@ class CardPredictor:
         Analyse les données pour trouver les Top 2 déclencheurs par ENSEIGNE DE RÉSULTAT.
         Crée des règles même avec peu de données (minimum 1 occurrence).
         """
-        # Grouper par enseigne de RÉSULTAT (♠️, ♥️, ♦️, ♣️)
-        result_suit_groups = defaultdict(lambda: defaultdict(int))
-        
-        for entry in self.inter_data:
-            trigger_card = entry['declencheur']  # Ex: 6♦️
-            result_suit = entry['result_suit']   # Ex: ♣️
-            
-            # Compter combien de fois ce déclencheur mène à cette enseigne de résultat
-            result_suit_groups[result_suit][trigger_card] += 1
+        # Compteurs par enseigne de RÉSULTAT, tenus à jour par collect_inter_data
+        result_suit_groups = self._inter_stats
         
         self.smart_rules = []
         
@@ -304,17 +508,13 @@ class CardPredictor:
         for result_suit in ['♠️', '♥️', '♦️', '♣️']:
             result_normalized = "❤️" if result_suit == "♥️" else result_suit
             
-            triggers_for_this_suit = result_suit_groups.get(result_suit, {})
+            triggers_for_this_suit = result_suit_groups.get(result_suit)
             
             if not triggers_for_this_suit:
                 continue
             
-            # Trier par fréquence et prendre jusqu'à 2 meilleurs (même avec 1 seule occurrence)
-            top_triggers = sorted(
-                triggers_for_this_suit.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:2]
+            # Jusqu'à 2 meilleurs par fréquence (même avec 1 seule occurrence) ; ordre stable à égalité
+            top_triggers = triggers_for_this_suit.most_common(2)
             
             for trigger_card, count in top_triggers:
                 self.smart_rules.append({
@@ -324,6 +524,8 @@ class CardPredictor:
                     'result_suit': result_normalized  # Pour affichage
                 })
         
+        self._index_smart_rules()
+        
         # Activer le mode INTER si on a au moins 1 règle
         if force_activate:
             self.is_inter_mode_active = True
@@ -335,7 +537,7 @@ class CardPredictor:
             self.is_inter_mode_active = False
             
         self.last_analysis_time = time.time()
-        self._save_all_data()
+        self._save_all_data('smart_rules', 'is_inter_mode_active', 'active_admin_chat_id', 'last_analysis_time')
 
         logger.info(f"🧠 Analyse terminée. Règles trouvées: {len(self.smart_rules)}. Mode actif: {self.is_inter_mode_active}")
         
@@ -347,6 +549,36 @@ class CardPredictor:
                 msg = f"⚠️ **Pas assez de données**\n\n{len(self.inter_data)} jeux collectés. Continuez à jouer pour créer des règles."
             self.telegram_message_sender(chat_id, msg)
 
+    def _rebuild_inter_stats(self):
+        """Recalcule {enseigne résultat: Counter(déclencheur)} à partir de inter_data (chargement uniquement)."""
+        self._inter_stats: Dict[str, Counter] = defaultdict(Counter)
+        for entry in self.inter_data:
+            self._inter_stats[entry['result_suit']][entry['declencheur']] += 1
+
+    def _discount_inter_entry(self, entry: Dict):
+        """Retire une entrée INTER des compteurs (un déclencheur à zéro disparaît)."""
+        counts = self._inter_stats[entry['result_suit']]
+        counts[entry['declencheur']] -= 1
+        if counts[entry['declencheur']] <= 0:
+            del counts[entry['declencheur']]
+
+    def _index_smart_rules(self):
+        """
+        Précalcule {déclencheur: (enseigne prédite, origine)} pour les modes TOP1 (1er par enseigne) et TOP2.
+        Les règles INTER priment sur les règles statiques, qui complètent la table.
+        """
+        top1: Dict[str, Tuple[str, str]] = {}
+        top2: Dict[str, Tuple[str, str]] = {}
+        rank_by_suit = defaultdict(int)
+        for rule in self.smart_rules:
+            rank = rank_by_suit[rule['predict']]
+            rank_by_suit[rule['predict']] += 1
+            # À déclencheur égal, la première règle (ordre ♠️ ♥️ ♦️ ♣️) l'emporte
+            if rank < 1: top1.setdefault(rule['trigger'], (rule['predict'], "INTER (TOP1)"))
+            if rank < 2: top2.setdefault(rule['trigger'], (rule['predict'], "INTER (TOP2)"))
+        self._top1_rules = {**_STATIC_RULE_MAP, **top1}
+        self._top2_rules = {**_STATIC_RULE_MAP, **top2}
+
     def check_and_update_rules(self):
         """Vérification périodique (30 minutes)."""
         current_time = time.time()
@@ -423,8 +655,7 @@ class CardPredictor:
         return False
 
     def should_predict(self, message: str) -> Tuple[bool, Optional[int], Optional[str]]:
-        self.check_and_update_rules()
-        
+        # La mise à jour INTER périodique (check_and_update_rules) est planifiée dans main.py
         game_number = self.extract_game_number(message)
         if not game_number: return False, None, None
         
@@ -436,7 +667,7 @@ class CardPredictor:
                 return False, None, None
             else:
                 self.wait_until_next_update = 0
-                self._save_all_data()
+                self._save_all_data('wait_until_next_update')
                 logger.info("✅ Fin d'attente (30 min écoulées). Prédictions reprises.")
         
         if self.last_predicted_game_number and (game_number - self.last_predicted_game_number < 3):
@@ -447,34 +678,18 @@ class CardPredictor:
         if not info: return False, None, None
         first_card, _ = info 
         
-        predicted_suit = None
-
-        # A. PRIORITÉ 1 : MODE INTER
+        # Table unique : INTER (TOP1 pendant la période de restriction, sinon TOP2) puis STATIQUE
         if self.is_inter_mode_active and self.smart_rules:
-            use_single_trigger_only = time.time() < self.single_trigger_until
-            
-            rules_by_suit = defaultdict(list)
-            for rule in self.smart_rules:
-                rules_by_suit[rule['predict']].append(rule)
-            
-            for suit_rules in rules_by_suit.values():
-                rules_to_check = suit_rules[:1] if use_single_trigger_only else suit_rules[:2]
-                for rule in rules_to_check:
-                    if rule['trigger'] == first_card:
-                        predicted_suit = rule['predict']
-                        mode_info = "TOP1" if use_single_trigger_only else "TOP2"
-                        logger.info(f"🔮 INTER ({mode_info}): Déclencheur {first_card} -> Prédit {predicted_suit}")
-                        break
-                if predicted_suit:
-                    break
+            rules = self._top1_rules if current_time < self.single_trigger_until else self._top2_rules
+        else:
+            rules = _STATIC_RULE_MAP
+        
+        rule = rules.get(first_card)
+        if rule:
+            predicted_suit, origin = rule
+            logger.info(f"🔮 {origin}: Déclencheur {first_card} -> Prédit {predicted_suit}")
             
-        # B. PRIORITÉ 2 : MODE STATIQUE
-        if not predicted_suit and first_card in STATIC_RULES:
-            predicted_suit = STATIC_RULES[first_card]
-            logger.info(f"🔮 STATIQUE: Déclencheur {first_card} -> Prédit {predicted_suit}")
-
-        if predicted_suit:
-            if self.last_prediction_time and time.time() < self.last_prediction_time + self.prediction_cooldown:
+            if self.last_prediction_time and current_time < self.last_prediction_time + self.prediction_cooldown:
                 return False, None, None
                 
             return True, game_number, predicted_suit
@@ -490,6 +705,7 @@ class CardPredictor:
         target = game_number_source + 2
         txt = self.prepare_prediction_text(game_number_source, suit)
         
+        if target in self.predictions: self._count_prediction(self.predictions[target], -1)
         self.predictions[target] = {
             'predicted_costume': suit, 
             'status': 'pending', 
@@ -498,11 +714,13 @@ class CardPredictor:
             'message_id': message_id_bot, 
             'is_inter': self.is_inter_mode_active
         }
+        self._pending_predictions[target] = self.predictions[target]
+        self._count_prediction(self.predictions[target], 1)
         
         self.last_prediction_time = time.time()
         self.last_predicted_game_number = game_number_source
         self.consecutive_fails = 0
-        self._save_all_data()
+        self._save_all_data('predictions', 'last_prediction_time', 'last_predicted_game_number', 'consecutive_fails')
 
     # --- VERIFICATION LOGIQUE ---
 
@@ -514,29 +732,16 @@ class CardPredictor:
         """Vérifie une prédiction (message édité)"""
         return self._verify_prediction_common(message, is_edited=True)
 
+    def get_first_group_content(self, message: str) -> str:
+        """Retourne le contenu normalisé (❤️ -> ♥️) du PREMIER groupe (chaîne vide si absent)."""
+        group = _first_group(message)
+        if group is None: return ''
+        logger.info(f"🎯 Vérification: premier groupe ({group})")
+        return group
+
     def check_costume_in_first_parentheses(self, message: str, predicted_costume: str) -> bool:
         """Vérifie si le costume prédit apparaît dans le PREMIER parenthèses"""
-        # Récupérer TOUTES les cartes du premier groupe
-        all_cards = self.get_all_cards_in_first_group(message)
-        
-        if not all_cards:
-            logger.debug("🎯 Aucune carte trouvée dans le premier groupe")
-            return False
-        
-        # Log pour montrer toutes les cartes vues
-        logger.info(f"🎯 Vérification: {len(all_cards)} carte(s) dans premier groupe: {', '.join(all_cards)}")
-        
-        # Normaliser le costume prédit
-        normalized_costume = predicted_costume.replace("❤️", "♥️")
-        
-        # Vérifier si au moins UNE carte du groupe a le costume prédit
-        for card in all_cards:
-            if card.endswith(normalized_costume):
-                logger.info(f"✅ Costume {normalized_costume} trouvé dans carte {card}")
-                return True
-        
-        logger.debug(f"❌ Costume {normalized_costume} non trouvé dans {', '.join(all_cards)}")
-        return False
+        return _normalize_hearts(predicted_costume) in self.get_first_group_content(message)
 
     def _verify_prediction_common(self, message: str, is_edited: bool = False) -> Optional[Dict]:
         """Logique de vérification commune - UNIQUEMENT pour messages finalisés."""
@@ -548,31 +753,35 @@ class CardPredictor:
         
         if not is_structurally_valid: return None
 
-        if not self.predictions: return None
+        if not self._pending_predictions: return None
         
         verification_result = None
+        current_time = time.time()
+        first_group = None  # Contenu du 1er groupe, extrait une seule fois au besoin
 
         # --- ÉTAPE 3 : Vérification du gain/perte ---
-        for predicted_game in sorted(self.predictions.keys()):
-            prediction = self.predictions[predicted_game]
-
-            if prediction.get('status') != 'pending': continue
+        # Seuls les jeux de la fenêtre [N-5, N] peuvent être vérifiés : accès direct, du plus ancien au plus récent
+        for predicted_game in range(game_number - MAX_VERIFICATION_OFFSET, game_number + 1):
+            prediction = self._pending_predictions.get(predicted_game)
+            if prediction is None: continue
 
             verification_offset = game_number - predicted_game
-            
-            if verification_offset < 0 or verification_offset > 5: continue
 
             predicted_costume = prediction.get('predicted_costume')
             if not predicted_costume: continue
 
             # CAS A: SUCCÈS (Décalage 0, 1 ou 2)
-            costume_found = self.check_costume_in_first_parentheses(message, predicted_costume)
+            if first_group is None: first_group = self.get_first_group_content(message)
+            costume_found = _normalize_hearts(predicted_costume) in first_group
             
             if costume_found and verification_offset <= 2:
                 status_symbol = SYMBOL_MAP.get(verification_offset, f"✅{verification_offset}️⃣")
                 updated_message = f"🔵{predicted_game}🔵:{predicted_costume} statut :{status_symbol}"
 
                 prediction['status'] = 'won'
+                del self._pending_predictions[predicted_game]
+                self._prediction_counts['pending'] -= 1
+                self._prediction_counts['won'] += 1
                 prediction['verification_count'] = verification_offset
                 prediction['final_message'] = updated_message
                 self.consecutive_fails = 0
@@ -580,13 +789,13 @@ class CardPredictor:
                 if verification_offset == 2:
                     self.consecutive_two_wins += 1
                     if self.consecutive_two_wins >= 2:
-                        self.wait_until_next_update = time.time() + 1800
+                        self.wait_until_next_update = current_time + 1800
                         self.consecutive_two_wins = 0
                         logger.info("⚠️ 2x ✅2️⃣ consécutifs: Attente 30 min avant prochaine prédiction.")
                 else:
                     self.consecutive_two_wins = 0
                 
-                self._save_all_data()
+                self._save_all_data('predictions', 'consecutive_fails', 'consecutive_two_wins', 'wait_until_next_update')
 
                 verification_result = {
                     'type': 'edit_message',
@@ -601,10 +810,13 @@ class CardPredictor:
                 updated_message = f"🔵{predicted_game}🔵:{predicted_costume} statut :{status_symbol}"
 
                 prediction['status'] = 'lost'
+                del self._pending_predictions[predicted_game]
+                self._prediction_counts['pending'] -= 1
+                self._prediction_counts['lost'] += 1
                 prediction['final_message'] = updated_message
                 
                 self.consecutive_two_wins = 0
-                self.wait_until_next_update = time.time() + 1800
+                self.wait_until_next_update = current_time + 1800
                 
                 if prediction.get('is_inter'):
                     self.is_inter_mode_active = False 
@@ -612,13 +824,16 @@ class CardPredictor:
                 else:
                     self.consecutive_fails += 1
                     if self.consecutive_fails >= 2:
-                        self.single_trigger_until = time.time() + 3600
+                        self.single_trigger_until = current_time + 3600
                         self.analyze_and_set_smart_rules(force_activate=True) 
                         logger.info("⚠️ 2 Échecs Statiques : Activation INTER (TOP1 uniquement pendant 1h).")
                     else:
                         logger.info("❌ Échec Statique : Attente 30 min.")
                 
-                self._save_all_data()
+                self._save_all_data(
+                    'predictions', 'consecutive_fails', 'consecutive_two_wins',
+                    'wait_until_next_update', 'is_inter_mode_active', 'single_trigger_until'
+                )
 
                 verification_result = {
                     'type': 'edit_message',
@@ -647,6 +862,7 @@ class CardPredictor:
                 non_inter_count += 1
         
         self.predictions = inter_predictions
+        self._index_predictions()
         
         inter_message_ids = {pred.get('message_id') for pred in inter_predictions.values() if pred.get('message_id')}
         new_pending_edits = {}
@@ -667,7 +883,9 @@ class CardPredictor:
         self.wait_until_next_update = 0
         self.last_reset_time = time.time()
         
-        self._save_all_data()
+        # Seuls les fichiers touchés par le reset sont réécrits, immédiatement
+        for attr in RESET_STATE_ATTRS:
+            self._save_data(getattr(self, attr), STATE_FILES[attr][0])
         
         logger.info(f"🔄 Reset manuel: {non_inter_count} prédictions auto supprimées, {len(inter_predictions)} INTER conservées")
         
@@ -676,35 +894,50 @@ class CardPredictor:
             'kept_inter': len(inter_predictions),
             'removed_pending': removed_pending
         }
-    
+
+    def drop_automatic_predictions(self) -> Dict[str, int]:
+        """
+        Purge nocturne : retire uniquement les prédictions non-INTER (index et compteurs compris).
+        Contrairement à reset_automatic_predictions, ne touche ni aux délais de contrôle ni aux pending_edits.
+        """
+        removed = 0
+        for game_num, prediction in list(self.predictions.items()):
+            if prediction.get('is_inter', False): continue
+            del self.predictions[game_num]
+            self._pending_predictions.pop(game_num, None)
+            self._count_prediction(prediction, -1)
+            removed += 1
+
+        self._save_data(self.predictions, STATE_FILES['predictions'][0])
+
+        return {
+            'removed': removed,
+            'kept_inter': len(self.predictions)
+        }
+
     def get_bot_status(self) -> str:
         """Retourne l'état complet du bot."""
-        from datetime import datetime
-        
+        # Compteurs tenus à jour par make_prediction / la vérification / le reset
+        counts = self._prediction_counts
         total_predictions = len(self.predictions)
-        auto_predictions = sum(1 for p in self.predictions.values() if not p.get('is_inter', False))
-        inter_predictions = sum(1 for p in self.predictions.values() if p.get('is_inter', False))
-        
-        won_predictions = sum(1 for p in self.predictions.values() if p.get('status') == 'won')
-        lost_predictions = sum(1 for p in self.predictions.values() if p.get('status') == 'lost')
-        pending_predictions = sum(1 for p in self.predictions.values() if p.get('status') == 'pending')
+        inter_predictions = counts['inter']
+        auto_predictions = total_predictions - inter_predictions
+        won_predictions = counts['won']
+        lost_predictions = counts['lost']
+        pending_predictions = counts['pending']
         
         source_id = self.target_channel_id or self.HARDCODED_SOURCE_ID or "Non défini"
         prediction_id = self.prediction_channel_id or self.HARDCODED_PREDICTION_ID or "Non défini"
         
         last_reset_str = "Jamais"
         if self.last_reset_time:
-            last_reset_dt = datetime.fromtimestamp(self.last_reset_time)
-            last_reset_str = last_reset_dt.strftime("%d/%m/%Y %H:%M:%S")
+            last_reset_str = _format_timestamp(self.last_reset_time, "%d/%m/%Y %H:%M:%S")
         
         last_update_str = "Jamais"
         next_update_str = "N/A"
         if self.last_analysis_time:
-            last_update_dt = datetime.fromtimestamp(self.last_analysis_time)
-            last_update_str = last_update_dt.strftime("%d/%m/%Y %H:%M:%S")
-            next_update_ts = self.last_analysis_time + 1800
-            next_update_dt = datetime.fromtimestamp(next_update_ts)
-            next_update_str = next_update_dt.strftime("%H:%M:%S")
+            last_update_str = _format_timestamp(self.last_analysis_time, "%d/%m/%Y %H:%M:%S")
+            next_update_str = _format_timestamp(self.last_analysis_time + 1800, "%H:%M:%S")
         
         mode_status = "INTER (Intelligent)" if self.is_inter_mode_active else "STATIQUE"
         current_time = time.time()
@@ -757,6 +990,3 @@ class CardPredictor:
 • Top 2 déclencheurs par enseigne utilisés
 """
         return message
-
-# Global instance
-card_predictor = CardPredictor()
@@ -3,9 +3,13 @@
 import logging
 import time
 import json
-from collections import defaultdict
-from typing import Dict, Any, Optional
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict, deque
+from typing import Dict, Any, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -18,7 +22,21 @@ except ImportError:
     logger.error("❌ IMPOSSIBLE D'IMPORTER CARDPREDICTOR")
     CardPredictor = None
 
-user_message_counts = defaultdict(list)
+# --- LIMITE DE MESSAGES PAR UTILISATEUR ---
+RATE_LIMIT_MAX = 30           # messages max par utilisateur...
+RATE_LIMIT_WINDOW = 60.0      # ...sur cette fenêtre glissante (secondes)
+RATE_LIMIT_CLEANUP_INTERVAL = 300.0  # purge périodique des utilisateurs inactifs
+
+# Fenêtre bornée par utilisateur : un horodatage de plus que la limite suffit à la détecter
+user_message_counts = defaultdict(lambda: deque(maxlen=RATE_LIMIT_MAX + 1))
+_last_rate_limit_cleanup = 0.0
+
+# --- LIMITES D'ENVOI TELEGRAM ---
+SEND_GLOBAL_LIMIT = 30        # messages max par seconde (tous chats confondus)
+SEND_CHAT_INTERVAL = 1.0      # secondes min entre deux messages vers le même chat
+SEND_GROUP_LIMIT = 20         # messages max par minute vers un même groupe/canal
+SEND_WORKERS = 4              # envois en arrière-plan (éditions de vérification)
+SEND_RETRY_AFTER_MAX = 5      # au-delà (secondes), un 429 n'est pas réessayé : le thread ne doit pas dormir
 
 # --- MESSAGES UTILISATEUR NETTOYÉS ---
 WELCOME_MESSAGE = """
@@ -85,20 +103,82 @@ class TelegramHandlers:
         self.bot_token = bot_token
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
         
+        # Session HTTP persistante : réutilise la connexion TLS vers api.telegram.org
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        
+        # Fenêtres glissantes des envois (limiteur côté client, évite les 429)
+        self._send_lock = threading.Lock()
+        self._global_sends: list = []  # heures d'envoi triées (bisect)
+        self._chat_sends = defaultdict(deque)
+        self._last_send_cleanup = 0.0
+        # Envois dont le résultat n'est pas attendu : le webhook répond sans attendre Telegram
+        self._send_executor = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix='telegram-send')
+        
         if CardPredictor:
-            # On passe la fonction d'envoi pour les notifs INTER
-            self.card_predictor = CardPredictor(telegram_message_sender=self.send_message)
+            # On passe la fonction d'envoi pour les notifs INTER (en arrière-plan : elles partent
+            # souvent sous le verrou de l'état, qui ne doit pas attendre Telegram)
+            self.card_predictor = CardPredictor(telegram_message_sender=self.send_message_async)
         else:
             self.card_predictor = None
 
     # --- MESSAGERIE ---
     def _check_rate_limit(self, user_id):
+        global _last_rate_limit_cleanup
         now = time.time()
-        user_message_counts[user_id] = [t for t in user_message_counts[user_id] if now - t < 60]
-        user_message_counts[user_id].append(now)
-        return len(user_message_counts[user_id]) <= 30
+        if now - _last_rate_limit_cleanup >= RATE_LIMIT_CLEANUP_INTERVAL:
+            _last_rate_limit_cleanup = now
+            for idle_user in [u for u, sends in user_message_counts.items() if not sends or now - sends[-1] >= RATE_LIMIT_WINDOW]:
+                del user_message_counts[idle_user]
+        
+        sends = user_message_counts[user_id]
+        while sends and now - sends[0] >= RATE_LIMIT_WINDOW:
+            sends.popleft()
+        sends.append(now)
+        return len(sends) <= RATE_LIMIT_MAX
+
+    def _reserve_send_slot(self, chat_id, not_before: float = 0.0) -> float:
+        """
+        Réserve le prochain créneau d'envoi autorisé (30/s global, 1/s par chat, 20/min par groupe)
+        et retourne son heure. Le créneau est inscrit dans les fenêtres sous le verrou ; l'attente
+        se fait hors verrou (voir _wait_until), sans bloquer les envois vers les autres chats.
+        """
+        with self._send_lock:
+            now = time.time()
+            # Les fenêtres contiennent aussi des créneaux réservés (futurs) ; on retire les expirés
+            global_cut = bisect.bisect_right(self._global_sends, now - 1.0)
+            if global_cut: del self._global_sends[:global_cut]
+            # Purge périodique des chats sans envoi depuis plus d'une minute
+            if now - self._last_send_cleanup >= RATE_LIMIT_CLEANUP_INTERVAL:
+                self._last_send_cleanup = now
+                for idle_chat in [c for c, sends in self._chat_sends.items() if not sends or now - sends[-1] >= 60.0]:
+                    del self._chat_sends[idle_chat]
+            chat_sends = self._chat_sends[chat_id]
+            while chat_sends and now - chat_sends[0] >= 60.0:
+                chat_sends.popleft()
+            
+            slot = max(now, not_before)
+            if chat_sends:
+                slot = max(slot, chat_sends[-1] + SEND_CHAT_INTERVAL)
+            if isinstance(chat_id, int) and chat_id < 0 and len(chat_sends) >= SEND_GROUP_LIMIT:
+                slot = max(slot, chat_sends[-SEND_GROUP_LIMIT] + 60.0)
+            # Limite globale : moins de SEND_GLOBAL_LIMIT envois dans la seconde qui précède le créneau
+            while True:
+                first = bisect.bisect_right(self._global_sends, slot - 1.0)
+                if bisect.bisect_right(self._global_sends, slot) - first < SEND_GLOBAL_LIMIT: break
+                slot = self._global_sends[first] + 1.0
+            
+            bisect.insort(self._global_sends, slot)
+            chat_sends.append(slot)
+            return slot
 
-    def send_message(self, chat_id: int, text: str, parse_mode='Markdown', message_id: Optional[int] = None, edit=False, reply_markup: Optional[Dict] = None) -> Optional[int]:
+    def _wait_until(self, slot: float):
+        """Attend l'heure d'un créneau réservé (hors verrou)."""
+        delay = slot - time.time()
+        if delay > 0: time.sleep(delay)
+
+    def _prepare_message(self, chat_id: int, text: str, parse_mode='Markdown', message_id: Optional[int] = None, edit=False, reply_markup: Optional[Dict] = None) -> Optional[Tuple]:
+        """Construit la requête et réserve son créneau dès l'appel : (chat_id, méthode, payload, créneau)."""
         if not chat_id or not text: return None
         
         method = 'editMessageText' if (message_id or edit) else 'sendMessage'
@@ -107,19 +187,45 @@ class TelegramHandlers:
         if message_id: payload['message_id'] = message_id
         if reply_markup: 
             payload['reply_markup'] = json.dumps(reply_markup) if isinstance(reply_markup, dict) else reply_markup
+        
+        return chat_id, method, payload, self._reserve_send_slot(chat_id)
 
+    def _deliver(self, chat_id: int, method: str, payload: Dict, slot: float) -> Optional[int]:
         try:
-            r = requests.post(f"{self.base_url}/{method}", json=payload, timeout=10)
-            if r.status_code == 200:
-                return r.json().get('result', {}).get('message_id')
-            else:
+            for attempt in range(2):
+                self._wait_until(slot)
+                r = self.session.post(f"{self.base_url}/{method}", json=payload, timeout=10)
+                if r.status_code == 200:
+                    return r.json().get('result', {}).get('message_id')
+                if r.status_code == 429 and attempt == 0:
+                    # Telegram indique le délai à respecter : le nouvel essai réserve un créneau après ce délai
+                    retry_after = r.json().get('parameters', {}).get('retry_after', 1)
+                    if retry_after > SEND_RETRY_AFTER_MAX:
+                        logger.error(f"⏳ Limite Telegram atteinte (429), délai de {retry_after}s trop long : message abandonné")
+                        break
+                    logger.warning(f"⏳ Limite Telegram atteinte (429), nouvel essai dans {retry_after}s")
+                    slot = self._reserve_send_slot(chat_id, time.time() + retry_after)
+                    continue
                 logger.error(f"Erreur Telegram {r.status_code}: {r.text}")
+                break
         except Exception as e:
             logger.error(f"Exception envoi message: {e}")
         return None
 
+    def send_message(self, chat_id: int, text: str, parse_mode='Markdown', message_id: Optional[int] = None, edit=False, reply_markup: Optional[Dict] = None) -> Optional[int]:
+        request = self._prepare_message(chat_id, text, parse_mode, message_id, edit, reply_markup)
+        return self._deliver(*request) if request else None
+
+    def send_message_async(self, chat_id: int, text: str, **kwargs):
+        """
+        Envoie/édite en arrière-plan (pas de message_id retourné). Le créneau est réservé dans le
+        thread appelant : vers un même chat, les envois partent dans l'ordre des appels (espacés
+        d'au moins SEND_CHAT_INTERVAL), qu'ils passent par send_message ou send_message_async.
+        """
+        request = self._prepare_message(chat_id, text, **kwargs)
+        if request: self._send_executor.submit(self._deliver, *request)
+
     # --- GESTION COMMANDE /deploy ---
-    # (Le code de _handle_command_deploy n'a pas été modifié)
     def _handle_command_deploy(self, chat_id: int):
         try:
             self.send_message(chat_id, "📦 **Génération de ya.zip pour render.com...**")
@@ -139,6 +245,10 @@ class TelegramHandlers:
             
             zip_filename = 'ya.zip'
             
+            # Les fichiers JSON doivent refléter l'état en mémoire (sauvegardes différées et en file d'attente)
+            if self.card_predictor:
+                self.card_predictor.flush()
+            
             import zipfile
             import os
             
@@ -161,15 +271,18 @@ class TelegramHandlers:
             url = f"{self.base_url}/sendDocument"
             with open(zip_filename, 'rb') as f:
                 files = {'document': (zip_filename, f, 'application/zip')}
-                data_count = len(self.card_predictor.inter_data) if self.card_predictor else 0
-                rules_count = len(self.card_predictor.smart_rules) if self.card_predictor else 0
+                data_count = rules_count = 0
+                if self.card_predictor:
+                    with self.card_predictor.lock:
+                        data_count = len(self.card_predictor.inter_data)
+                        rules_count = len(self.card_predictor.smart_rules)
                 
                 data = {
                     'chat_id': chat_id,
                     'caption': f'📦 **ya.zip - Package render.com**\n\n✅ Port : 10000 (render.com)\n✅ Tous les fichiers inclus\n✅ **{data_count} jeux collectés**\n✅ **{rules_count} règles INTER**\n✅ Instructions incluses\n\n**Déploiement render.com :**\n1. Téléversez sur render.com\n2. Variables env : BOT_TOKEN, WEBHOOK_URL\n3. Port : 10000\n\nVoir RENDER_DEPLOYMENT_INSTRUCTIONS.md pour les détails',
                     'parse_mode': 'Markdown'
                 }
-                response = requests.post(url, data=data, files=files, timeout=60)
+                response = self.session.post(url, data=data, files=files, timeout=60)
             
             if response.json().get('ok'):
                 logger.info(f"✅ ya.zip envoyé avec succès")
@@ -189,9 +302,11 @@ class TelegramHandlers:
             self.send_message(chat_id, "❌ Le moteur de prédiction n'est pas chargé.")
             return
         
-        # Récupérer les informations
-        is_active = self.card_predictor.is_inter_mode_active
-        total_collected = len(self.card_predictor.inter_data)
+        # Récupérer les informations (copie sous verrou, le message est construit hors verrou)
+        with self.card_predictor.lock:
+            is_active = self.card_predictor.is_inter_mode_active
+            inter_data = list(self.card_predictor.inter_data)
+        total_collected = len(inter_data)
         
         # Message d'état
         message = "🧠 **ETAT DU MODE INTELLIGENT**\n\n"
@@ -199,12 +314,12 @@ class TelegramHandlers:
         message += f"Données collectées : {total_collected}\n\n"
         
         # Afficher TOUS les déclencheurs collectés par enseigne
-        if self.card_predictor.inter_data:
+        if inter_data:
             from collections import defaultdict
             
             # Grouper par enseigne de résultat
             by_result_suit = defaultdict(list)
-            for entry in self.card_predictor.inter_data:
+            for entry in inter_data:
                 result_suit = entry.get('result_suit', '?')
                 trigger = entry.get('declencheur', '?').replace("♥️", "❤️")
                 by_result_suit[result_suit].append(trigger)
@@ -256,7 +371,8 @@ class TelegramHandlers:
             return
         
         try:
-            message = self.card_predictor.get_bot_status()
+            with self.card_predictor.lock:
+                message = self.card_predictor.get_bot_status()
             self.send_message(chat_id, message)
         except Exception as e:
             logger.error(f"Erreur /etat : {e}")
@@ -270,7 +386,8 @@ class TelegramHandlers:
             return
         
         try:
-            result = self.card_predictor.reset_automatic_predictions()
+            with self.card_predictor.lock:
+                result = self.card_predictor.reset_automatic_predictions()
             
             message = f"""🔄 **RÉINITIALISATION EFFECTUÉE**
 
@@ -301,16 +418,19 @@ Le bot est prêt pour de nouvelles prédictions."""
         action = parts[1] if len(parts) > 1 else 'status'
         
         if action == 'activate':
-            self.card_predictor.analyze_and_set_smart_rules(chat_id=chat_id, force_activate=True)
+            with self.card_predictor.lock:
+                self.card_predictor.analyze_and_set_smart_rules(chat_id=chat_id, force_activate=True)
             self.send_message(chat_id, "✅ **MODE INTER ACTIVÉ**\nL'analyse Top 2 par enseigne est en cours...")
         
         elif action == 'default':
-            self.card_predictor.is_inter_mode_active = False
-            self.card_predictor._save_all_data()
+            with self.card_predictor.lock:
+                self.card_predictor.is_inter_mode_active = False
+                self.card_predictor._save_all_data('is_inter_mode_active')
             self.send_message(chat_id, "❌ **MODE INTER DÉSACTIVÉ**\nRetour aux règles statiques.")
             
         elif action == 'status':
-            msg, kb = self.card_predictor.get_inter_status()
+            with self.card_predictor.lock:
+                msg, kb = self.card_predictor.get_inter_status()
             self.send_message(chat_id, msg, reply_markup=kb)
         
         else:
@@ -326,16 +446,18 @@ Le bot est prêt pour de nouvelles prédictions."""
 
         # Actions INTER
         if data == 'inter_apply':
-            self.card_predictor.analyze_and_set_smart_rules(chat_id=chat_id, force_activate=True)
-            # Mise à jour du message pour confirmer l'action
-            msg, kb = self.card_predictor.get_inter_status()
+            with self.card_predictor.lock:
+                self.card_predictor.analyze_and_set_smart_rules(chat_id=chat_id, force_activate=True)
+                # Mise à jour du message pour confirmer l'action
+                msg, kb = self.card_predictor.get_inter_status()
             self.send_message(chat_id, msg, message_id=msg_id, edit=True, reply_markup=kb)
         
         elif data == 'inter_default':
-            self.card_predictor.is_inter_mode_active = False
-            self.card_predictor._save_all_data()
-            # Mise à jour du message pour confirmer l'action
-            msg, kb = self.card_predictor.get_inter_status()
+            with self.card_predictor.lock:
+                self.card_predictor.is_inter_mode_active = False
+                self.card_predictor._save_all_data('is_inter_mode_active')
+                # Mise à jour du message pour confirmer l'action
+                msg, kb = self.card_predictor.get_inter_status()
             self.send_message(chat_id, msg, message_id=msg_id, edit=True, reply_markup=kb)
             
         # Actions CONFIG
@@ -344,13 +466,17 @@ Le bot est prêt pour de nouvelles prédictions."""
                 self.send_message(chat_id, "Configuration annulée.", message_id=msg_id, edit=True)
             else:
                 type_c = 'source' if 'source' in data else 'prediction'
-                self.card_predictor.set_channel_id(chat_id, type_c)
+                with self.card_predictor.lock:
+                    self.card_predictor.set_channel_id(chat_id, type_c)
                 self.send_message(chat_id, f"✅ Ce canal est maintenant défini comme **{type_c.upper()}**.\n(L'ID forcé dans le code sera utilisé si le bot redémarre sans ce fichier de config)", message_id=msg_id, edit=True)
 
     # --- UPDATES (PARTIE CORRIGÉE) ---
     def handle_update(self, update: Dict[str, Any]):
+        # L'état de prédiction est partagé avec les tâches planifiées (main.py) : il n'est lu/modifié
+        # que sous card_predictor.lock, et les messages sont envoyés après avoir relâché le verrou.
         try:
             if not self.card_predictor: return
+            lock = self.card_predictor.lock
 
             if ('message' in update and 'text' in update['message']) or ('channel_post' in update and 'text' in update['channel_post']):
                 
@@ -370,9 +496,10 @@ Le bot est prêt pour de nouvelles prédictions."""
                 elif text.startswith('/start'):
                     self.send_message(chat_id, WELCOME_MESSAGE)
                 elif text.startswith('/stat'):
-                    sid = self.card_predictor.target_channel_id or self.card_predictor.HARDCODED_SOURCE_ID or "Non défini"
-                    pid = self.card_predictor.prediction_channel_id or self.card_predictor.HARDCODED_PREDICTION_ID or "Non défini"
-                    mode = "IA" if self.card_predictor.is_inter_mode_active else "Statique"
+                    with lock:
+                        sid = self.card_predictor.target_channel_id or self.card_predictor.HARDCODED_SOURCE_ID or "Non défini"
+                        pid = self.card_predictor.prediction_channel_id or self.card_predictor.HARDCODED_PREDICTION_ID or "Non défini"
+                        mode = "IA" if self.card_predictor.is_inter_mode_active else "Statique"
                     self.send_message(chat_id, f"📊 **STATUS**\nSource (Input): `{sid}`\nPrédiction (Output): `{pid}`\nMode: {mode}")
                 elif text.startswith('/etat'):
                     self._handle_command_etat(chat_id)
@@ -386,29 +513,37 @@ Le bot est prêt pour de nouvelles prédictions."""
                 # Traitement Canal Source
                 elif str(chat_id) == str(self.card_predictor.target_channel_id):
                     
-                    # A. Collecter TOUJOURS (même messages temporaires ⏰)
-                    game_num = self.card_predictor.extract_game_number(text)
-                    if game_num:
-                        self.card_predictor.collect_inter_data(game_num, text)
+                    with lock:
+                        # A. Collecter TOUJOURS (même messages temporaires ⏰)
+                        game_num = self.card_predictor.extract_game_number(text)
+                        if game_num:
+                            self.card_predictor.collect_inter_data(game_num, text)
+                        
+                        # B. Vérifier UNIQUEMENT sur messages finalisés (✅ ou 🔰)
+                        res = None
+                        if self.card_predictor.has_completion_indicators(text):
+                            res = self.card_predictor._verify_prediction_common(text)
+                        
+                        # C. Prédire (même sur messages temporaires ⏰)
+                        ok, num, val = self.card_predictor.should_predict(text)
+                        prediction_channel_id = self.card_predictor.prediction_channel_id
+                        if ok:
+                            txt = self.card_predictor.prepare_prediction_text(num, val)
                     
-                    # B. Vérifier UNIQUEMENT sur messages finalisés (✅ ou 🔰)
-                    if self.card_predictor.has_completion_indicators(text) or '🔰' in text:
-                        res = self.card_predictor._verify_prediction_common(text)
+                    # Envois hors verrou, dans cet ordre : édition de vérification puis prédiction
+                    # (créneaux réservés à l'appel, voir send_message_async)
+                    if res and res['type'] == 'edit_message':
+                        mid_to_edit = res.get('message_id_to_edit') 
                         
-                        if res and res['type'] == 'edit_message':
-                            mid_to_edit = res.get('message_id_to_edit') 
-                            
-                            if mid_to_edit: 
-                                self.send_message(self.card_predictor.prediction_channel_id, res['new_message'], message_id=mid_to_edit, edit=True)
+                        if mid_to_edit: 
+                            self.send_message_async(prediction_channel_id, res['new_message'], message_id=mid_to_edit, edit=True)
                     
-                    # C. Prédire (même sur messages temporaires ⏰)
-                    ok, num, val = self.card_predictor.should_predict(text)
                     if ok:
-                        txt = self.card_predictor.prepare_prediction_text(num, val)
-                        mid = self.send_message(self.card_predictor.prediction_channel_id, txt)
+                        mid = self.send_message(prediction_channel_id, txt)
                         
                         if mid:
-                            self.card_predictor.make_prediction(num, val, mid)
+                            with lock:
+                                self.card_predictor.make_prediction(num, val, mid)
 
             # 2. Messages édités (CRITIQUE pour vérification)
             elif ('edited_message' in update and 'text' in update['edited_message']) or ('edited_channel_post' in update and 'text' in update['edited_channel_post']):
@@ -419,20 +554,23 @@ Le bot est prêt pour de nouvelles prédictions."""
                 
                 # Traitement Canal Source - Vérification sur messages édités
                 if str(chat_id) == str(self.card_predictor.target_channel_id):
-                    # Collecter TOUJOURS
-                    game_num = self.card_predictor.extract_game_number(text)
-                    if game_num:
-                        self.card_predictor.collect_inter_data(game_num, text)
+                    with lock:
+                        # Collecter TOUJOURS
+                        game_num = self.card_predictor.extract_game_number(text)
+                        if game_num:
+                            self.card_predictor.collect_inter_data(game_num, text)
+                        
+                        # Vérifier UNIQUEMENT sur messages finalisés (✅ ou 🔰)
+                        res = None
+                        if self.card_predictor.has_completion_indicators(text):
+                            res = self.card_predictor.verify_prediction_from_edit(text)
+                        prediction_channel_id = self.card_predictor.prediction_channel_id
                     
-                    # Vérifier UNIQUEMENT sur messages finalisés (✅ ou 🔰)
-                    if self.card_predictor.has_completion_indicators(text) or '🔰' in text:
-                        res = self.card_predictor.verify_prediction_from_edit(text)
+                    if res and res['type'] == 'edit_message':
+                        mid_to_edit = res.get('message_id_to_edit')
                         
-                        if res and res['type'] == 'edit_message':
-                            mid_to_edit = res.get('message_id_to_edit')
-                            
-                            if mid_to_edit:
-                                self.send_message(self.card_predictor.prediction_channel_id, res['new_message'], message_id=mid_to_edit, edit=True)
+                        if mid_to_edit:
+                            self.send_message_async(prediction_channel_id, res['new_message'], message_id=mid_to_edit, edit=True)
 
             # 3. Callbacks
             elif 'callback_query' in update:
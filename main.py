@@ -4,13 +4,13 @@
 Main entry point for the Telegram bot deployment on render.com
 """
 import os
-import json
 import logging
 from flask import Flask, request, jsonify
 import requests
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-import pytz
+from apscheduler.triggers.interval import IntervalTrigger
+from zoneinfo import ZoneInfo
 
 # Importe la configuration et le bot
 from config import Config
@@ -23,6 +23,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Fuseau du Bénin (zoneinfo, construit une seule fois)
+BENIN_TZ = ZoneInfo('Africa/Porto-Novo')
+
 # Initialize bot and config
 try:
     config = Config()
@@ -104,52 +107,48 @@ def reset_non_inter_predictions():
     """
     Réinitialise les prédictions automatiques (non-INTER) à 00h59 heure du Bénin.
     Garde les données 'collected_games.json' et 'inter_data.json' intactes.
+    Passe par le CardPredictor en mémoire : réécrire predictions.json directement
+    serait écrasé par la sauvegarde suivante de l'état en mémoire.
     """
+    predictor = bot.handlers.card_predictor
+    if not predictor:
+        logger.info("📊 Moteur de prédiction indisponible, rien à réinitialiser.")
+        return
     try:
-        predictions_file = 'predictions.json'
-        
-        if not os.path.exists(predictions_file):
-            logger.info("📊 Aucun fichier predictions.json à réinitialiser.")
-            return
-        
-        with open(predictions_file, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                logger.info("📊 Fichier predictions.json vide, rien à réinitialiser.")
-                return
-            predictions = json.loads(content)
-        
-        inter_predictions = {}
-        non_inter_count = 0
-        
-        for game_num, prediction in predictions.items():
-            if prediction.get('is_inter', False):
-                inter_predictions[game_num] = prediction
-            else:
-                non_inter_count += 1
-        
-        with open(predictions_file, 'w') as f:
-            json.dump(inter_predictions, f, indent=4)
+        with predictor.lock:
+            result = predictor.drop_automatic_predictions()
         
         logger.info(f"🔄 Réinitialisation programmée effectuée à 00h59 (Bénin):")
-        logger.info(f"   - {non_inter_count} prédictions automatiques supprimées")
-        logger.info(f"   - {len(inter_predictions)} prédictions INTER conservées")
+        logger.info(f"   - {result['removed']} prédictions automatiques supprimées")
+        logger.info(f"   - {result['kept_inter']} prédictions INTER conservées")
         logger.info(f"   - collected_games.json et inter_data.json NON modifiés")
         
     except Exception as e:
         logger.error(f"❌ Erreur lors de la réinitialisation programmée: {e}")
 
+def refresh_inter_rules():
+    """
+    Mise à jour INTER périodique, hors du traitement des messages.
+    check_and_update_rules ne relance l'analyse que si la dernière date de plus de 30 min.
+    """
+    predictor = bot.handlers.card_predictor
+    if not predictor:
+        return
+    try:
+        with predictor.lock:
+            predictor.check_and_update_rules()
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la mise à jour INTER périodique: {e}")
+
 def setup_scheduler():
-    """Configure le planificateur pour la réinitialisation quotidienne."""
+    """Configure le planificateur (réinitialisation quotidienne et mise à jour INTER)."""
     try:
         scheduler = BackgroundScheduler()
         
-        benin_tz = pytz.timezone('Africa/Porto-Novo')
-        
         trigger = CronTrigger(
             hour=0,
             minute=59,
-            timezone=benin_tz
+            timezone=BENIN_TZ
         )
         
         scheduler.add_job(
@@ -160,8 +159,16 @@ def setup_scheduler():
             replace_existing=True
         )
         
+        scheduler.add_job(
+            refresh_inter_rules,
+            trigger=IntervalTrigger(minutes=1),
+            id='inter_rules_refresh',
+            name='Mise à jour périodique des règles INTER',
+            replace_existing=True
+        )
+        
         scheduler.start()
-        logger.info("⏰ Planificateur configuré: réinitialisation à 00h59 (heure du Bénin)")
+        logger.info("⏰ Planificateur configuré: réinitialisation à 00h59 (heure du Bénin), règles INTER vérifiées chaque minute")
         
         return scheduler
     except Exception as e: